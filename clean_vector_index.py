@@ -14,20 +14,46 @@ python clean_vector_index.py \
   --dry-run
 """
 
-import argparse, json, os, re, time, shutil, math
-from collections import defaultdict
-from typing import List, Dict, Any, Set
+import argparse, json, os, re, time, shutil, math, hashlib, glob
+from typing import List, Dict, Any, Tuple, Optional
 from decimal import Decimal, InvalidOperation
 
 import numpy as np
 import faiss
 
+try:
+    import orjson  # optional: C-accelerated JSON parse/serialize
+except ImportError:
+    orjson = None
+
 # ---------- helpers ----------
 
+_INT_RE = re.compile(r'[+-]?\d+')
+_DEC_RE = re.compile(r'[+-]?\d+\.\d+')
+_WS_RE = re.compile(r"\s+")
+# Integer literals outside orjson's exact range (int64 min .. uint64 max); orjson parses these as lossy floats
+_BIG_INT_RE = re.compile(rb'(?<![\w.+-])(?:-\d{19,}|\d{20,})(?![\d.eE])')
+
 def normalize_text(s: str) -> str:
-    s = (s or "").strip().lower()
-    s = re.sub(r"\s+", " ", s)
-    return s
+    return _WS_RE.sub(" ", (s or "").strip().lower())
+
+def text_hash64(s: str) -> int:
+    """First 64 bits of SHA-1 of s, as a signed int (fits int64). Compact dedupe key."""
+    return int.from_bytes(hashlib.sha1(s.encode("utf-8", "surrogatepass")).digest()[:8], "little", signed=True)
+
+def hash_normalized_texts(texts: list) -> np.ndarray:
+    """text_hash64(normalize_text(t)) for each text; repeated texts are normalized and hashed only once."""
+    cache: Dict[str, int] = {}
+    out = np.empty(len(texts), dtype=np.int64)
+    for i, t in enumerate(texts):
+        if type(t) is not str:
+            out[i] = text_hash64(normalize_text(t))
+            continue
+        h = cache.get(t)
+        if h is None:
+            h = cache[t] = text_hash64(normalize_text(t))
+        out[i] = h
+    return out
 
 def to_float(x, default=0.0):
     try:
@@ -38,6 +64,19 @@ def to_float(x, default=0.0):
     except Exception:
         return default
 
+def to_float_array(values: list, default=0.0) -> np.ndarray:
+    """Batch to_float: float64 array with missing/NaN/Inf/unparseable entries set to default."""
+    n = len(values)
+    try:
+        arr = np.asarray(values, dtype=np.float64)  # None -> NaN, numeric strings parsed like float()
+    except (TypeError, ValueError, OverflowError):
+        arr = None
+    if arr is None or arr.shape != (n,):
+        # Some entry is not a scalar float() accepts; convert per-entry
+        return np.fromiter((to_float(x, default) for x in values), dtype=np.float64, count=n)
+    arr[~np.isfinite(arr)] = default
+    return arr
+
 def to_int(x, default=0):
     """Safe int64 parse without float() to avoid precision loss on large IDs."""
     try:
@@ -47,79 +86,230 @@ def to_int(x, default=0):
             return default
         if isinstance(x, int):
             return x
+        if isinstance(x, np.integer):
+            return int(x)
         if isinstance(x, str):
             s = x.strip()
             # integer string
-            if re.fullmatch(r'[+-]?\d+', s):
+            if _INT_RE.fullmatch(s):
                 return int(s)
             # decimal string – truncate toward zero
-            if re.fullmatch(r'[+-]?\d+\.\d+', s):
+            if _DEC_RE.fullmatch(s):
                 try:
                     return int(Decimal(s).to_integral_value(rounding="ROUND_DOWN"))
                 except InvalidOperation:
                     return default
             return default
-        # last resort (e.g., numpy int types)
+        # last resort: floats (truncated toward zero) and other numeric types
         return int(x)
     except Exception:
         return default
 
-def is_valid_vector_id(x) -> bool:
-    """Valid if parseable to non-zero int64."""
+def parse_vector_id(x) -> Tuple[bool, int]:
+    """Parse a vector_id once. Returns (True, id) if it is a non-zero int64, else (False, 0)."""
     try:
         v = to_int(x, 0)
     except Exception:
-        return False
-    if v == 0:
-        return False
-    return -(1 << 63) <= v <= (1 << 63) - 1
+        return False, 0
+    if v == 0 or not -(1 << 63) <= v <= (1 << 63) - 1:
+        return False, 0
+    return True, v
 
-def choose_better(a: Dict[str, Any], b: Dict[str, Any]) -> Dict[str, Any]:
+def parse_vector_ids(values) -> Tuple[np.ndarray, np.ndarray]:
     """
-    Pick the better memory between a and b.
-    Preference: decided=True > newer timestamp > higher confidence > longer original
+    Vectorized vector_id parse. Returns (ids as int64, valid mask).
+    Entries that are unparseable, zero, or outside int64 get id 0 and valid=False.
     """
-    a_dec = bool(a.get("decided", True))
-    b_dec = bool(b.get("decided", True))
-    if a_dec != b_dec:
-        return a if a_dec else b
-
-    ta = to_float(a.get("timestamp"), 0.0)
-    tb = to_float(b.get("timestamp"), 0.0)
-    if ta != tb:
-        return a if ta > tb else b
-
-    ca = to_float(a.get("confidence"), 0.0)
-    cb = to_float(b.get("confidence"), 0.0)
-    if ca != cb:
-        return a if ca > cb else b
-
-    return a if len((a.get("original") or "")) >= len((b.get("original") or "")) else b
+    n = len(values)
+    # Fast path: ids loaded from JSON as plain ints (the common case)
+    if all(type(v) is int for v in values):
+        try:
+            ids = np.array(values, dtype=np.int64)
+            return ids, ids != 0
+        except OverflowError:
+            pass  # some id is outside int64; parse per-entry below
+    ids = np.fromiter((parse_vector_id(x)[1] for x in values), dtype=np.int64, count=n)
+    return ids, ids != 0
+
+def pick_dedupe_winners(keys: np.ndarray, decided: np.ndarray, ts: np.ndarray,
+                        conf: np.ndarray, olen: np.ndarray) -> np.ndarray:
+    """
+    Indices of the best record per dedupe key, ordered by each key's first occurrence.
+    Preference: decided=True > newer timestamp > higher confidence > longer original > earlier position
+    """
+    if len(keys) == 0:
+        return np.empty(0, dtype=np.intp)
+    pos = np.arange(len(keys))
+    # lexsort: last key is primary; within each dedupe key the winner sorts first
+    order = np.lexsort((pos, -olen, -conf, -ts, ~decided, keys))
+    sorted_keys = keys[order]
+    group_start = np.empty(len(keys), dtype=bool)
+    group_start[0] = True
+    np.not_equal(sorted_keys[1:], sorted_keys[:-1], out=group_start[1:])
+    winners = order[group_start]  # one per key, ascending key order
+    _, first_pos = np.unique(keys, return_index=True)  # same ascending key order
+    return winners[np.argsort(first_pos)]
+
+def load_json(path: str) -> Tuple[Any, bool]:
+    """
+    Parse a JSON file. Returns (data, strict) where strict means orjson parsed it,
+    so the data is plain JSON (no NaN/Infinity, no integers beyond 64 bits) that
+    orjson can write back losslessly.
+    """
+    with open(path, "rb") as f:
+        raw = f.read()
+    # orjson silently turns integers beyond 64 bits into floats; keep those files on the stdlib path
+    if orjson is not None and not _BIG_INT_RE.search(raw):
+        try:
+            return orjson.loads(raw), True
+        except orjson.JSONDecodeError:
+            pass  # e.g. NaN/Infinity literals or lone surrogates; let the stdlib parser decide
+    return json.loads(raw), False
+
+def dump_json(path: str, data: Any, strict: bool = False):
+    """
+    Write data as indented UTF-8 JSON; uses orjson when available and the input was strict JSON.
+    Writes to a temp file and renames it over path, so readers never see a partial file.
+    """
+    tmp = f"{path}.tmp"
+    try:
+        if orjson is not None and strict:
+            with open(tmp, "wb") as f:
+                f.write(orjson.dumps(data, option=orjson.OPT_INDENT_2))
+        else:
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump(data, f, indent=2, ensure_ascii=False)
+        if os.path.exists(path):
+            shutil.copymode(path, tmp)
+        os.replace(tmp, path)
+    except BaseException:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+        raise
+
+def copy_file(src: str, dst: str):
+    """
+    Copy src to dst (with metadata, like shutil.copy2) via os.copy_file_range where available, so the
+    kernel can reflink on CoW filesystems (Btrfs/XFS) or copy server-side on NFS instead of moving bytes.
+    """
+    if hasattr(os, "copy_file_range"):
+        try:
+            with open(src, "rb") as fsrc, open(dst, "wb") as fdst:
+                remaining = os.fstat(fsrc.fileno()).st_size
+                while remaining > 0:
+                    n = os.copy_file_range(fsrc.fileno(), fdst.fileno(), remaining)
+                    if n == 0:
+                        break
+                    remaining -= n
+            if remaining == 0:
+                shutil.copystat(src, dst)
+                return
+        except OSError:
+            pass  # e.g. unsupported by kernel/filesystem or cross-device; fall back to a regular copy
+    shutil.copy2(src, dst)
 
 def backup_file(path: str):
     if not os.path.exists(path):
         return None
     ts = time.strftime("%Y%m%d-%H%M%S")
     bpath = f"{path}.bak-{ts}"
-    shutil.copy2(path, bpath)
+    copy_file(path, bpath)
     return bpath
 
-def load_faiss_ids(index_path: str) -> Set[int]:
-    """Load FAISS index and return the set of stored IDs. Supports IndexIDMap / IndexIDMap2."""
-    if not os.path.exists(index_path):
-        raise FileNotFoundError(f"Index not found: {index_path}")
-    idx = faiss.read_index(index_path)
-
-    ids_set: Set[int] = set()
+def isin_sorted(values: np.ndarray, sorted_ids: np.ndarray) -> np.ndarray:
+    """Membership mask of values in a sorted int64 array (binary search, no re-sort of sorted_ids)."""
+    if len(sorted_ids) == 0:
+        return np.zeros(len(values), dtype=bool)
+    pos = np.searchsorted(sorted_ids, values)
+    pos[pos == len(sorted_ids)] = 0
+    return sorted_ids[pos] == values
+
+def extract_ids_from_index(idx) -> np.ndarray:
+    """Return the IDs stored in an open FAISS index as a sorted, unique int64 array. Supports IndexIDMap / IndexIDMap2."""
+    ids = np.empty(0, dtype=np.int64)
     try:
         # In many builds, IndexIDMap exposes id_map as a vector<idx_t>
-        arr = faiss.vector_to_array(idx.id_map)
-        arr = np.asarray(arr, dtype=np.int64)  # ensure int64
-        ids_set = set(int(v) for v in arr.tolist())
+        id_map = idx.id_map
+        n = id_map.size()
+        if n > 0:
+            # Zero-copy int64 view of the C++ vector (only valid while idx is alive);
+            # np.unique writes the sorted ids into a fresh array we own
+            view = np.asarray(faiss.rev_swig_ptr(id_map.data(), n), dtype=np.int64)
+            ids = np.unique(view)
     except Exception:
         # Not an IDMap; skip existence filtering
         pass
-    return ids_set
+    return ids
+
+def diff_sorted_ids(a: np.ndarray, b: np.ndarray) -> np.ndarray:
+    """
+    IDs in a but not in b, for sorted unique int64 arrays.
+    Identical sets (the steady state on repeat runs) short-circuit with a linear compare instead of a sort-merge.
+    """
+    if len(a) == len(b) and np.array_equal(a, b):
+        return np.empty(0, dtype=np.int64)
+    return np.setdiff1d(a, b, assume_unique=True)
+
+def id_cache_path(index_path: str) -> str:
+    """Sidecar path for the cached id array, keyed by the index file's mtime, size, inode and ctime."""
+    st = os.stat(index_path)
+    return f"{index_path}.ids.{st.st_mtime_ns}-{st.st_size}-{st.st_ino}-{st.st_ctime_ns}.npy"
+
+def remove_cached_ids(index_path: str, keep: Optional[str] = None):
+    """Delete id caches next to the index (all of them, or all but keep)."""
+    for stale in glob.glob(glob.escape(index_path) + ".ids.*.npy"):
+        if stale != keep:
+            try:
+                os.remove(stale)
+            except OSError:
+                pass
+
+def load_cached_ids(index_path: str) -> Optional[np.ndarray]:
+    """Memory-map the cached id array for the current index file, or None if there is no usable cache."""
+    path = id_cache_path(index_path)
+    if not os.path.exists(path):
+        return None
+    try:
+        return np.load(path, mmap_mode="r")
+    except (OSError, ValueError):
+        return None
+
+def save_cached_ids(index_path: str, ids: np.ndarray):
+    """
+    Cache the index's sorted id array next to it and delete caches for older versions of the file.
+    Best-effort: if the cache can't be written (e.g. read-only directory), carry on without one.
+    """
+    tmp = None
+    try:
+        path = id_cache_path(index_path)
+        tmp = f"{path}.tmp"
+        with open(tmp, "wb") as f:
+            np.save(f, np.asarray(ids, dtype=np.int64))
+        os.replace(tmp, path)
+    except OSError as e:
+        print(f"Could not write FAISS id cache ({e}); continuing without it.")
+        if tmp is not None and os.path.exists(tmp):
+            try:
+                os.remove(tmp)
+            except OSError:
+                pass
+        return
+    remove_cached_ids(index_path, keep=path)
+
+def make_id_selector(ids: np.ndarray):
+    """
+    Build a FAISS IDSelector for a sorted, unique int64 id array.
+    Contiguous ids -> IDSelectorRange; dense non-negative ids -> IDSelectorBitmap
+    (bit test per probe, bitmap no larger than the id array itself); otherwise IDSelectorBatch (hash set).
+    """
+    lo, hi = int(ids[0]), int(ids[-1])
+    if hi - lo + 1 == len(ids) and hi < (1 << 63) - 1:
+        return faiss.IDSelectorRange(lo, hi + 1)
+    if lo >= 0 and (hi >> 3) + 1 <= ids.nbytes:
+        bitmap = np.zeros((hi >> 3) + 1, dtype=np.uint8)
+        np.bitwise_or.at(bitmap, ids >> 3, (1 << (ids & 7)).astype(np.uint8))
+        return faiss.IDSelectorBitmap(bitmap)
+    return faiss.IDSelectorBatch(ids)
 
 # ---------- main ----------
 
@@ -132,89 +322,106 @@ def main():
     ap.add_argument("--drop-exact", nargs="*", default=[], help='Exact strings to drop (case/whitespace-insensitive).')
     ap.add_argument("--no-backup", action="store_true", help="Do not create .bak files for index/JSON.")
     ap.add_argument("--dry-run", action="store_true", help="Show what would change but do not modify files.")
+    ap.add_argument("--no-id-cache", action="store_true", help="Do not read/write the .ids.*.npy FAISS id cache next to the index (never written on --dry-run).")
     args = ap.parse_args()
 
     # Load JSON
     if not os.path.exists(args.json):
         raise FileNotFoundError(f"JSON not found: {args.json}")
-    with open(args.json, "r", encoding="utf-8") as f:
-        data: List[Dict[str, Any]] = json.load(f)
+    data: List[Dict[str, Any]]
+    data, json_strict = load_json(args.json)
     if not isinstance(data, list):
         raise ValueError("Expected JSON to be a list of memory objects.")
 
     total_before = len(data)
 
-    # Load FAISS IDs (for existence check)
-    faiss_ids = load_faiss_ids(args.index)
+    # Load FAISS IDs (for existence check): from the id cache if it matches the index file,
+    # otherwise read the index once and keep the handle for removal
+    if not os.path.exists(args.index):
+        raise FileNotFoundError(f"Index not found: {args.index}")
+    index = None
+    faiss_ids = None if args.no_id_cache else load_cached_ids(args.index)
+    if faiss_ids is None:
+        index = faiss.read_index(args.index)
+        faiss_ids = extract_ids_from_index(index)
+        if not args.no_id_cache and not args.dry_run:
+            save_cached_ids(args.index, faiss_ids)
     faiss_id_check_enabled = len(faiss_ids) > 0  # only validate existence if we could read ids
 
     # Filter: min confidence, require valid vector_id, and (optionally) existence in FAISS
-    filtered = []
-    invalid_id_count = 0
-    low_conf_count = 0
+    confs = to_float_array([m.get("confidence") for m in data], 0.0)
+    vids, valid = parse_vector_ids([m.get("vector_id", None) for m in data])
+    low_conf = confs < float(args.min_confidence)
+    keep_mask = valid & ~low_conf
+    low_conf_count = int(np.count_nonzero(low_conf))
+    invalid_id_count = int(np.count_nonzero(~valid & ~low_conf))
     orphan_json_count = 0  # JSON entries whose id not found in FAISS
-    for m in data:
-        conf = to_float(m.get("confidence"), 0.0)
-        if conf < float(args.min_confidence):
-            low_conf_count += 1
-            continue
-        vid_raw = m.get("vector_id", None)
-        if not is_valid_vector_id(vid_raw):
-            invalid_id_count += 1
-            continue
-        vid = to_int(vid_raw)
-        if faiss_id_check_enabled and vid not in faiss_ids:
-            orphan_json_count += 1
-            continue
-        filtered.append(m)
+    if faiss_id_check_enabled:
+        in_faiss = isin_sorted(vids, faiss_ids)
+        orphan_json_count = int(np.count_nonzero(keep_mask & ~in_faiss))
+        keep_mask &= in_faiss
+    filtered_idx = np.flatnonzero(keep_mask)
+    filtered = [data[i] for i in filtered_idx]
+
+    # Hash each surviving original's normalized text once; reused by drop-exact and dedupe
+    norm_hashes = hash_normalized_texts([m.get("original", "") for m in filtered])
 
     # Drop exact boilerplate strings
     drop_norms = set(normalize_text(s) for s in args.drop_exact)
     if drop_norms:
-        filtered = [m for m in filtered if normalize_text(m.get("original", "")) not in drop_norms]
-
-    # Dedupe by normalized original text
-    by_text: Dict[str, Dict[str, Any]] = {}
-    for m in filtered:
-        key = normalize_text(m.get("original", ""))
-        if key == "":
-            key = f"__empty_{m.get('vector_id')}"
-        if key not in by_text:
-            by_text[key] = m
-        else:
-            by_text[key] = choose_better(by_text[key], m)
-
-    dedup_list = list(by_text.values())
-
-    # Subject cap (facet diversification)
+        drop_hashes = np.fromiter((text_hash64(s) for s in drop_norms), dtype=np.int64, count=len(drop_norms))
+        sel = np.flatnonzero(~np.isin(norm_hashes, drop_hashes))
+        filtered = [filtered[i] for i in sel]
+        norm_hashes = norm_hashes[sel]
+        filtered_idx = filtered_idx[sel]
+
+    # Dedupe by normalized original text (keyed by its 64-bit SHA-1 prefix);
+    # entries with empty text are kept apart, one key per vector_id
+    n_filtered = len(filtered)
+    keys = norm_hashes.copy()
+    for i in np.flatnonzero(norm_hashes == text_hash64("")):
+        keys[i] = text_hash64(f"__empty_{filtered[i].get('vector_id')}")
+    decided = np.fromiter((bool(m.get("decided", True)) for m in filtered), dtype=bool, count=n_filtered)
+    ts = to_float_array([m.get("timestamp") for m in filtered], 0.0)
+    olen = np.fromiter((len(m.get("original") or "") for m in filtered), dtype=np.int64, count=n_filtered)
+    winners = pick_dedupe_winners(keys, decided, ts, confs[filtered_idx], olen)
+    dedup_idx = filtered_idx[winners]  # positions in data, reused for keep_ids
+    dedup_list = [data[i] for i in dedup_idx]
+    dedup_count = len(dedup_list)
+
+    # Subject cap (facet diversification): keep the top-N per subject by (timestamp, confidence)
     if args.subject_cap and int(args.subject_cap) > 0:
-        subject_counts = defaultdict(int)
-        kept = []
-        dedup_list.sort(
-            key=lambda m: (to_float(m.get("timestamp"), 0.0), to_float(m.get("confidence"), 0.0)),
-            reverse=True
+        cap = int(args.subject_cap)
+        n_dedup = len(dedup_list)
+        # Integer code per distinct subject (only equality matters for grouping)
+        codes: Dict[str, int] = {}
+        subj_codes = np.fromiter(
+            (codes.setdefault((m.get("subject") or "").strip().lower(), len(codes)) for m in dedup_list),
+            dtype=np.intp, count=n_dedup
         )
-        for m in dedup_list:
-            subj = (m.get("subject") or "").strip().lower()
-            if subject_counts[subj] < int(args.subject_cap):
-                kept.append(m)
-                subject_counts[subj] += 1
-        dedup_list = kept
+        # Global rank: newest first, then most confident; ties keep dedupe order (stable)
+        order = np.lexsort((np.arange(n_dedup), -confs[dedup_idx], -ts[winners]))
+        # Group by subject, preserving rank order inside each group, then rank within the group
+        grouped = order[np.argsort(subj_codes[order], kind="stable")]
+        grouped_codes = subj_codes[grouped]
+        group_starts = np.flatnonzero(np.r_[True, grouped_codes[1:] != grouped_codes[:-1]])
+        group_sizes = np.diff(np.r_[group_starts, n_dedup])
+        rank_within = np.arange(n_dedup) - np.repeat(group_starts, group_sizes)
+        keep = np.zeros(n_dedup, dtype=bool)
+        keep[grouped[rank_within < cap]] = True
+        dedup_idx = dedup_idx[order[keep[order]]]
+        dedup_list = [data[i] for i in dedup_idx]
 
     # Determine IDs to keep/remove (type-safe)
-    keep_ids = set(to_int(m.get("vector_id")) for m in dedup_list if "vector_id" in m)
-    json_valid_ids = set(
-        to_int(m.get("vector_id"))
-        for m in data
-        if "vector_id" in m and is_valid_vector_id(m.get("vector_id"))
-    )
+    keep_ids = np.unique(vids[dedup_idx])
+    json_valid_ids = np.unique(vids[valid])
     # IDs to remove from FAISS are those valid JSON IDs not kept
-    rm_ids = sorted(list(json_valid_ids - keep_ids))
+    rm_ids = diff_sorted_ids(json_valid_ids, keep_ids)
 
     # Also remove FAISS vectors that aren't in final JSON (two-way sync)
-    orphan_faiss_ids = []
+    orphan_faiss_ids = np.empty(0, dtype=np.int64)
     if faiss_id_check_enabled:
-        orphan_faiss_ids = sorted(list(faiss_ids - keep_ids))
+        orphan_faiss_ids = diff_sorted_ids(faiss_ids, keep_ids)
 
     # Stats
     print("=== Cleaner Summary ===")
@@ -226,7 +433,7 @@ def main():
     else:
         print("FAISS id listing not available; skipping JSON→FAISS existence filter.")
     print(f"After min-confidence/drop-exact/valid-id/exists: {len(filtered)}")
-    print(f"After dedupe: {len(by_text)}")
+    print(f"After dedupe: {dedup_count}")
     if args.subject_cap and int(args.subject_cap) > 0:
         print(f"After subject cap ({args.subject_cap}/subject): {len(dedup_list)}")
     if faiss_id_check_enabled:
@@ -237,41 +444,58 @@ def main():
         print(f"Remove orphan vectors from FAISS (ids not in final JSON): {len(orphan_faiss_ids)}")
 
     if args.dry_run:
+        del index
         print("\n-- DRY RUN: no changes written --")
-        print("Sample rm_ids (first 10):", rm_ids[:10])
+        print("Sample rm_ids (first 10):", rm_ids[:10].tolist())
         if faiss_id_check_enabled:
-            print("Sample orphan_faiss_ids (first 10):", orphan_faiss_ids[:10])
+            print("Sample orphan_faiss_ids (first 10):", orphan_faiss_ids[:10].tolist())
         return
 
-    # Backups
-    if not args.no_backup:
-        jb = backup_file(args.json)
-        if jb: print(f"Backed up JSON -> {jb}")
+    # Unchanged JSON: every original entry survived, in order (identity, not deep compare)
+    json_changed = len(dedup_list) != total_before or any(a is not b for a, b in zip(dedup_list, data))
+    to_remove = np.union1d(rm_ids, orphan_faiss_ids)
+
+    # Before writing anything based on cached ids, check them against the index itself
+    if index is None and (json_changed or len(to_remove) > 0):
+        index = faiss.read_index(args.index)
+        if not np.array_equal(extract_ids_from_index(index), faiss_ids):
+            remove_cached_ids(args.index)
+            raise RuntimeError(
+                "FAISS id cache does not match the index (it changed since the cache was written). "
+                "The cache was removed and no files were modified; re-run the cleaner."
+            )
+
+    if json_changed:
+        # Backups
+        if not args.no_backup:
+            jb = backup_file(args.json)
+            if jb: print(f"Backed up JSON -> {jb}")
+
+        # Write pruned JSON
+        dump_json(args.json, dedup_list, strict=json_strict)
+        print(f"Wrote pruned JSON: {args.json}")
+    else:
+        print("JSON already clean; skipping rewrite.")
 
-    # Write pruned JSON
-    with open(args.json, "w", encoding="utf-8") as f:
-        json.dump(dedup_list, f, indent=2, ensure_ascii=False)
-    print(f"Wrote pruned JSON: {args.json}")
+    # Remove both sets of IDs (union) from the already-loaded index
+    if len(to_remove) == 0:
+        print("No FAISS mutations needed; skipping index rewrite.")
+        print("Done ✅")
+        return
 
     # Back up index
     if not args.no_backup:
         ib = backup_file(args.index)
         if ib: print(f"Backed up Index -> {ib}")
 
-    # Open FAISS and remove both sets of IDs (union)
-    index = faiss.read_index(args.index)
-    to_remove = set(rm_ids)
-    if faiss_id_check_enabled:
-        to_remove |= set(orphan_faiss_ids)
-
-    removed = 0
-    if len(to_remove) > 0:
-        sel = faiss.IDSelectorBatch(np.array(sorted(list(to_remove)), dtype="int64"))
-        removed = index.remove_ids(sel)
+    sel = make_id_selector(to_remove)
+    removed = index.remove_ids(sel)
     print(f"Removed {removed} vectors from FAISS.")
 
     faiss.write_index(index, args.index)
     print(f"Wrote updated FAISS index: {args.index}")
+    if not args.no_id_cache:
+        save_cached_ids(args.index, extract_ids_from_index(index))
     print("Done ✅")
 
 if __name__ == "__main__":
@@ -0,0 +1,23 @@
+import json
+
+import pytest
+
+import clean_vector_index as cvi
+
+
+@pytest.mark.parametrize("literal", [
+    "18446744073709551617",            # > uint64 max
+    "123456789012345678901234567890",
+    "-9223372036854775809",            # < int64 min
+])
+def test_json_roundtrip_keeps_big_ints_exact(tmp_path, literal):
+    path = tmp_path / "longterm.json"
+    path.write_text(f'[{{"vector_id": 1, "original": "a", "big": {literal}}}]', encoding="utf-8")
+
+    data, strict = cvi.load_json(str(path))
+    assert data[0]["big"] == int(literal)
+    assert strict is False
+
+    cvi.dump_json(str(path), data, strict=strict)
+    assert json.loads(path.read_text(encoding="utf-8"))[0]["big"] == int(literal)
+    assert literal in path.read_text(encoding="utf-8")